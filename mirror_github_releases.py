@@ -1,10 +1,24 @@
 import os
-import json
+import sys
+import multiprocessing
+import orjson
+import signal
+import sqlite3
+import shutil
+import tempfile
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
 import time
+import random
+import threading
 import traceback
-from github import Github, GithubException
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from github import Github, GithubException, GithubRetry, UnknownObjectException
+from github.GitRelease import GitRelease
+from github.GitReleaseAsset import GitReleaseAsset
 
 # 环境变量与配置
 SOURCE_REPO = os.environ['SOURCE_REPO']
@@ -15,18 +29,33 @@ SYNCED_DATA_FILE = os.environ.get('SYNCED_DATA_FILE', 'synced_data.json')  # 同
 SYNCED_DATA_BACKUP = f"{SYNCED_DATA_FILE}.bak"
 SOURCE_OWNER, SOURCE_REPO_NAME = SOURCE_REPO.split('/')
 RETRY_COUNT = int(os.environ.get('RETRY_COUNT', 3))  # 上传重试次数（默认3次）
-RETRY_DELAY = int(os.environ.get('RETRY_DELAY', 10))  # 重试间隔（秒，默认10秒）
+RETRY_DELAY = int(os.environ.get('RETRY_DELAY', 10))  # 重试基础间隔（秒，默认10秒，按指数退避递增）
+MAX_DELAY = int(os.environ.get('MAX_DELAY', 300))  # 单次重试最长等待（秒，默认300秒）
+CONCURRENCY = int(os.environ.get('CONCURRENCY', 4))  # 单个Release内并发传输的附件数（默认4个）
+# 临时文件目录：优先使用内存文件系统 /dev/shm，不存在时用系统默认临时目录
+TEMP_DIR = os.environ.get('TEMP_DIR') or ('/dev/shm' if os.path.isdir('/dev/shm') else None)
+RELEASE_WORKERS = int(os.environ.get('RELEASE_WORKERS', 4))  # 并行处理的Release数（进程数，默认4个）
+RATE_LIMIT_PER_HOUR = int(os.environ.get('RATE_LIMIT_PER_HOUR', 5000))  # GitHub API 主限流（次/小时）
+RATE_LIMIT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_PER_MINUTE', 80))  # 次级限流（次/分钟）
+RATE_LIMIT_THRESHOLD = int(os.environ.get('RATE_LIMIT_THRESHOLD', 100))  # 剩余额度低于此值时等待重置
 
-print(f"=== 配置信息 ===")
-print(f"源仓库: {SOURCE_REPO}")
-print(f"目标仓库: {TARGET_REPO}")
+_worker = {}  # 工作进程内的 GitHub 仓库对象与状态库连接（由 _init_worker 初始化）
+TEMP_PATHS = set()  # 本进程创建的临时文件路径，退出前统一清理
+_direct_urls = {}  # 下载地址 -> 302 跳转后的直链（预签名地址有效期短，仅在本次运行内缓存供重试使用）
+
+# 下载共用的 HTTP 会话：复用 TCP/TLS 连接，并对临时性错误自动重试
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=Retry(total=5, backoff_factor=1, status_forcelist=[429, 502, 503, 504])
+))
 
 
 ### 1. 同步状态文件管理
 def load_synced_data():
     def _load(path):
-        with open(path, 'r') as f:
-            return json.load(f)
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     
     try:
         if os.path.exists(SYNCED_DATA_FILE):
@@ -43,10 +72,11 @@ def load_synced_data():
 
 
 def save_synced_data(data):
+    """导出为 JSON 状态文件（保留上一版本作为备份）"""
     temp_file = f"{SYNCED_DATA_FILE}.tmp"
     try:
-        with open(temp_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(temp_file, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         if os.path.exists(SYNCED_DATA_FILE):
             os.replace(SYNCED_DATA_FILE, SYNCED_DATA_BACKUP)
         os.replace(temp_file, SYNCED_DATA_FILE)
@@ -57,62 +87,432 @@ def save_synced_data(data):
             os.remove(temp_file)
 
 
+class Store:
+    """同步状态库（SQLite + WAL）：每条记录单独写入，多进程/多线程可并发读写"""
+    
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS releases (
+                source_id TEXT PRIMARY KEY, tag_name TEXT, fully_synced_at TEXT, updated_at
+            );
+            CREATE TABLE IF NOT EXISTS assets (
+                source_id TEXT, asset_key TEXT, name TEXT, size INTEGER, updated_at,
+                etag TEXT, last_modified TEXT, synced_at TEXT,
+                PRIMARY KEY (source_id, asset_key)
+            );
+            CREATE TABLE IF NOT EXISTS source_codes (
+                tag_name TEXT, filename TEXT, synced_at TEXT,
+                PRIMARY KEY (tag_name, filename)
+            );
+        ''')
+    
+    def _execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    def get_release(self, source_id):
+        rows = self._execute('SELECT * FROM releases WHERE source_id = ?', (source_id,))
+        return dict(rows[0]) if rows else None
+    
+    def is_release_synced(self, source_id, updated_at):
+        """上次已完全同步且之后源Release无变化（旧版记录没有 updated_at，视为需要同步）"""
+        rec = self.get_release(source_id)
+        return bool(rec and rec.get('updated_at') and rec['updated_at'] >= updated_at)
+    
+    def mark_release(self, source_id, tag_name, fully_synced_at, updated_at):
+        self._execute(
+            '''INSERT INTO releases VALUES (?, ?, ?, ?)
+               ON CONFLICT(source_id) DO UPDATE SET tag_name = excluded.tag_name,
+               fully_synced_at = excluded.fully_synced_at, updated_at = excluded.updated_at''',
+            (source_id, tag_name, fully_synced_at, updated_at)
+        )
+    
+    def get_asset(self, source_id, asset_key):
+        rows = self._execute('SELECT * FROM assets WHERE source_id = ? AND asset_key = ?', (source_id, asset_key))
+        return dict(rows[0]) if rows else None
+    
+    def mark_asset(self, source_id, asset_key, name, size, updated_at, etag, last_modified, synced_at):
+        self._execute(
+            '''INSERT INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(source_id, asset_key) DO UPDATE SET name = excluded.name, size = excluded.size,
+               updated_at = excluded.updated_at, etag = excluded.etag,
+               last_modified = excluded.last_modified, synced_at = excluded.synced_at''',
+            (source_id, asset_key, name, size, updated_at, etag, last_modified, synced_at)
+        )
+    
+    def touch_asset(self, source_id, asset_key, synced_at):
+        self._execute(
+            'UPDATE assets SET synced_at = ? WHERE source_id = ? AND asset_key = ?',
+            (synced_at, source_id, asset_key)
+        )
+    
+    def has_source_code(self, tag_name, filename):
+        return bool(self._execute(
+            'SELECT 1 FROM source_codes WHERE tag_name = ? AND filename = ?', (tag_name, filename)
+        ))
+    
+    def mark_source_code(self, tag_name, filename, synced_at):
+        self._execute(
+            '''INSERT INTO source_codes VALUES (?, ?, ?)
+               ON CONFLICT(tag_name, filename) DO UPDATE SET synced_at = excluded.synced_at''',
+            (tag_name, filename, synced_at)
+        )
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+    
+    def counts(self):
+        return {
+            table: self._execute(f'SELECT COUNT(*) FROM {table}')[0][0]
+            for table in ('releases', 'assets', 'source_codes')
+        }
+    
+    def import_json(self, data):
+        """从旧版 JSON 状态导入（按原顺序写入，导出时保持相同顺序）"""
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')  # 单个事务批量导入，出错时整体回滚
+            self.conn.executemany('INSERT OR REPLACE INTO releases VALUES (?, ?, ?, ?)', [
+                (source_id, rec.get('tag_name'), rec.get('fully_synced_at'), rec.get('updated_at'))
+                for source_id, rec in data.get('releases', {}).items()
+            ])
+            self.conn.executemany('INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+                (source_id, asset_key, rec.get('name'), rec.get('size'), rec.get('updated_at'),
+                 rec.get('etag'), rec.get('last_modified'), rec.get('synced_at'))
+                for source_id, assets in data.get('assets', {}).items()
+                for asset_key, rec in assets.items()
+            ])
+            self.conn.executemany('INSERT OR REPLACE INTO source_codes VALUES (?, ?, ?)', [
+                (tag_name, filename, rec.get('synced_at'))
+                for tag_name, files in data.get('source_codes', {}).items()
+                for filename, rec in files.items()
+            ])
+    
+    def export_json(self):
+        """导出为与旧版 JSON 相同的结构（空字段省略）"""
+        def _record(row, fields):
+            return {field: row[field] for field in fields if row[field] is not None}
+        
+        data = {'releases': {}, 'assets': {}, 'source_codes': {}}
+        for row in self._execute('SELECT * FROM releases ORDER BY rowid'):
+            data['releases'][row['source_id']] = _record(row, ('tag_name', 'fully_synced_at', 'updated_at'))
+            data['assets'][row['source_id']] = {}  # 无附件的Release也保留空记录，与旧版结构一致
+        for row in self._execute('SELECT * FROM assets ORDER BY rowid'):
+            data['assets'].setdefault(row['source_id'], {})[row['asset_key']] = _record(
+                row, ('name', 'size', 'updated_at', 'etag', 'last_modified', 'synced_at')
+            )
+        for row in self._execute('SELECT * FROM source_codes ORDER BY rowid'):
+            data['source_codes'].setdefault(row['tag_name'], {})[row['filename']] = {
+                'exists': True, **_record(row, ('synced_at',))
+            }
+        return data
+
+
 ### 2. 核心工具函数
+class RateLimiter:
+    """滑动窗口限流器：每个 (次数, 秒数) 窗口内的调用数不超过上限（线程安全）"""
+    
+    def __init__(self, *windows):
+        self.windows = [(limit, period, deque()) for limit, period in windows]
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = 0
+                for limit, period, calls in self.windows:
+                    while calls and now - calls[0] >= period:
+                        calls.popleft()
+                    if len(calls) >= limit:
+                        wait = max(wait, period - (now - calls[0]))
+                if wait <= 0:
+                    for _, _, calls in self.windows:
+                        calls.append(now)
+                    return
+            time.sleep(wait)
+
+
+def make_rate_limiter():
+    """所有进程（主进程 + RELEASE_WORKERS 个工作进程）共用同一个 Token，限流额度按进程数均分"""
+    shares = RELEASE_WORKERS + 1
+    return RateLimiter(
+        (max(1, RATE_LIMIT_PER_HOUR // shares), 3600),
+        (max(1, RATE_LIMIT_PER_MINUTE // shares), 60)
+    )
+
+
+_rate_limiter = make_rate_limiter()
+
+
+def _gh_call(func, *args, **kwargs):
+    """经限流器调用 GitHub API，主限流耗尽（403/429 且剩余为0）时等待额度重置后重试"""
+    while True:
+        _rate_limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except GithubException as e:
+            headers = {k.lower(): v for k, v in (e.headers or {}).items()}
+            reset = headers.get('x-ratelimit-reset', '')
+            if e.status in (403, 429) and headers.get('x-ratelimit-remaining') == '0' and reset.isdigit():
+                wait = max(1, int(reset) - time.time() + 1)
+                print(f"GitHub API 额度耗尽，等待 {wait:.0f} 秒后重试")
+                time.sleep(wait)
+                continue
+            raise
+
+
+def make_github(token):
+    """创建 GitHub 客户端：每页100条（默认30条）以减少分页请求；GithubRetry 对服务端临时错误及次级限流（403）按提示时间退避重试"""
+    return Github(token, per_page=100, retry=GithubRetry(total=RETRY_COUNT))
+
+
+def wait_for_rate_limit(github_client):
+    """根据最近一次响应的限流信息，剩余额度过低时等待重置（不额外发请求）"""
+    remaining, _ = github_client.rate_limiting
+    if remaining < RATE_LIMIT_THRESHOLD:
+        wait = max(1, github_client.rate_limiting_resettime - time.time() + 1)
+        print(f"API 剩余额度 {remaining}，等待 {wait:.0f} 秒至重置")
+        time.sleep(wait)
+
+
+def make_temp_path(name):
+    """在 TEMP_DIR 中创建唯一的临时文件并登记路径，便于异常退出时清理"""
+    temp_file = tempfile.NamedTemporaryFile(prefix='mgr_', suffix=f"_{name}", dir=TEMP_DIR, delete=False)
+    temp_file.close()
+    TEMP_PATHS.add(temp_file.name)
+    return temp_file.name
+
+
+def remove_temp_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+    TEMP_PATHS.discard(path)
+
+
+def cleanup_temp_files():
+    """删除本进程登记过且仍存在的临时文件（无需扫描整个工作目录）"""
+    for path in list(TEMP_PATHS):
+        remove_temp_file(path)
+
+
+def get_release_updated_at(release):
+    """Release 的最近变更时间戳：发布时间与各附件更新时间中的最大值（取自列表接口数据，不额外请求）"""
+    times = [release.published_at, release.created_at] + [a.updated_at for a in release.assets]
+    return max(t.timestamp() for t in times if t)
+
+
 def get_asset_info(asset):
-    """获取资产的时间和大小信息（统一转为UTC时间）"""
+    """获取资产的大小和更新时间（Unix时间戳，比较时无需解析字符串）"""
     if not asset:
         return None
-    # 确保时间为UTC格式
-    updated_at = asset.updated_at.astimezone(datetime.timezone.utc) if asset.updated_at else None
     return {
         'size': asset.size,
-        'updated_at': updated_at.isoformat() if updated_at else None
+        'updated_at': asset.updated_at.timestamp() if asset.updated_at else None
     }
 
 
-def delete_existing_asset(target_release, asset_name):
-    """删除目标Release中同名的资产（解决422冲突）"""
-    for asset in target_release.get_assets():
-        if asset.name == asset_name:
-            try:
-                print(f"删除目标仓库中已存在的 {asset_name}")
-                asset.delete_asset()
-                return True
-            except Exception as e:
-                print(f"删除 {asset_name} 失败: {str(e)}")
+def retry_delay(attempt, headers=None):
+    """计算第 attempt 次失败后的等待时间：截断指数退避+抖动，并遵循 Retry-After 与限流重置时间"""
+    delay = min(MAX_DELAY, RETRY_DELAY * (2 ** attempt))
+    delay = random.uniform(delay / 2, delay)
+    
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    retry_after = headers.get('retry-after', '')
+    if retry_after.isdigit():
+        delay = max(delay, int(retry_after))
+    # 主限流额度耗尽（403/429 且剩余为0）：等到额度重置
+    if headers.get('x-ratelimit-remaining') == '0' and headers.get('x-ratelimit-reset', '').isdigit():
+        delay = max(delay, int(headers['x-ratelimit-reset']) - time.time() + 1)
+    return delay
+
+
+def get_validators(headers):
+    """提取响应中的缓存校验信息（用于下次条件请求）"""
+    return {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified')
+    }
+
+
+def resolve_download_url(url):
+    """解析下载地址的 302 跳转，得到 CDN 直链（直链请求不带 Authorization，不计入 API 额度）"""
+    if url in _direct_urls:
+        return _direct_urls[url]
+    try:
+        resp = SESSION.head(url, allow_redirects=False, timeout=60)
+        location = resp.headers.get('Location')
+        if resp.is_redirect and location:
+            _direct_urls[url] = location
+            return location
+    except Exception as e:
+        print(f"解析下载直链失败: {str(e)}")
+    return url
+
+
+def get_remote_size(url):
+    """HEAD 探测源文件大小（Content-Length），未知时返回 0"""
+    try:
+        resp = SESSION.head(resolve_download_url(url), allow_redirects=True, timeout=60)
+        return int(resp.headers.get('Content-Length', 0))
+    except Exception as e:
+        print(f"获取 {url} 大小失败: {str(e)}")
+        return 0
+
+
+def is_source_unchanged(url, record):
+    """用记录中的 ETag/Last-Modified 发起条件 HEAD 请求，源站返回 304 表示内容未变"""
+    headers = {}
+    if record.get('etag'):
+        headers['If-None-Match'] = record['etag']
+    if record.get('last_modified'):
+        headers['If-Modified-Since'] = record['last_modified']
+    if not headers:
+        return False
+    
+    try:
+        resp = SESSION.head(resolve_download_url(url), headers=headers, allow_redirects=True, timeout=60)
+        return resp.status_code == 304
+    except Exception as e:
+        print(f"条件请求失败: {str(e)}")
+        return False
+
+
+def delete_existing_asset(target_release, asset_name, assets_by_name):
+    """删除目标Release中同名的资产（解决422冲突），基于缓存的资产列表查找"""
+    asset = assets_by_name.pop(asset_name, None)
+    if not asset:
+        return False
+    try:
+        print(f"删除目标仓库中已存在的 {asset_name}")
+        _gh_call(asset.delete_asset)
+        return True
+    except Exception as e:
+        print(f"删除 {asset_name} 失败: {str(e)}")
     return False
 
 
-def retry_upload(target_release, file_path, name, content_type):
-    """带重试和冲突处理的上传函数"""
+class SizedStream:
+    """给流式请求体附上已知长度：requests 据此只发送 Content-Length，不会改用 chunked 编码
+    （下载响应的 resp.raw 无法获取长度，直接作为 data 会同时带上 Transfer-Encoding: chunked）"""
+    
+    def __init__(self, raw, size):
+        self.raw = raw
+        self.size = size
+    
+    def __len__(self):
+        return self.size
+    
+    def read(self, amt=-1):
+        return self.raw.read(amt)
+    
+    def __iter__(self):
+        return iter(lambda: self.raw.read(1024 * 1024), b'')
+
+
+def upload_release_asset(target_release, data, size, name, content_type):
+    """直接 POST 到 Release 的 upload_url（请求体流式发送，不整体读入内存），返回上传后的资产对象
+    （认证信息与返回对象均取自 target_release 所属的客户端）"""
+    requester = target_release._requester
+    headers = {'Content-Type': content_type}
+    if requester.auth:
+        headers['Authorization'] = f"{requester.auth.token_type} {requester.auth.token}"
+    upload_url = target_release.upload_url.split('{')[0]
+    resp = SESSION.post(
+        upload_url, params={'name': name}, data=SizedStream(data, size), timeout=600, headers=headers
+    )
+    if resp.status_code != 201:
+        try:
+            error_data = resp.json()
+        except ValueError:
+            error_data = {'message': resp.text}
+        raise GithubException(resp.status_code, error_data, dict(resp.headers))
+    return GitReleaseAsset(requester, dict(resp.headers), resp.json(), completed=True)
+
+
+def retry_upload(target_release, file_path, name, content_type, assets_by_name):
+    """带重试和冲突处理的上传函数（成功后更新资产缓存）"""
     for attempt in range(RETRY_COUNT):
+        headers = None
         try:
             # 上传前先删除同名文件（预防422错误）
-            delete_existing_asset(target_release, name)
+            delete_existing_asset(target_release, name, assets_by_name)
             
             print(f"尝试上传 {name}（尝试 {attempt+1}/{RETRY_COUNT}）")
-            uploaded_asset = target_release.upload_asset(
-                file_path, name=name, content_type=content_type
-            )
+            
+            def _upload():
+                # 每次调用重新打开文件，限流等待后重试时从头发送
+                with open(file_path, 'rb') as f:
+                    return upload_release_asset(target_release, f, os.path.getsize(file_path), name, content_type)
+            
+            uploaded_asset = _gh_call(_upload)
             if uploaded_asset:
+                assets_by_name[name] = uploaded_asset
                 return uploaded_asset
             print(f"上传返回 None，重试中...")
         except GithubException as e:
+            headers = e.headers
             if e.status == 422:
                 print(f"检测到文件冲突，强制删除后重试...")
-                delete_existing_asset(target_release, name)
+                # 缓存中可能没有冲突的文件（如上次上传中断留下的），刷新一次
+                if not delete_existing_asset(target_release, name, assets_by_name):
+                    for asset in _gh_call(lambda: list(target_release.get_assets())):
+                        if asset.name == name:
+                            assets_by_name[name] = asset
+                    delete_existing_asset(target_release, name, assets_by_name)
             else:
-                print(f"上传失败: {str(e)}，{RETRY_DELAY} 秒后重试")
+                print(f"上传失败: {str(e)}")
         except Exception as e:
-            print(f"上传失败: {str(e)}，{RETRY_DELAY} 秒后重试")
-        time.sleep(RETRY_DELAY)
+            print(f"上传失败: {str(e)}")
+        if attempt < RETRY_COUNT - 1:
+            delay = retry_delay(attempt, headers)
+            print(f"{delay:.1f} 秒后重试")
+            time.sleep(delay)
     print(f"上传 {name} 达到最大重试次数，放弃")
     return None
 
 
+def stream_asset_to_release(target_release, url, name, content_type, assets_by_name, validators=None):
+    """边下载边上传（不落盘），源站未返回 Content-Length 或传输失败时返回 None，由调用方回退到临时文件"""
+    try:
+        # resp.raw 不做解压：要求源站返回未压缩的原始内容，否则上传的会是压缩后的字节
+        with SESSION.get(
+            resolve_download_url(url), stream=True, timeout=600, headers={'Accept-Encoding': 'identity'}
+        ) as resp:
+            resp.raise_for_status()
+            if validators is not None:
+                validators.update(get_validators(resp.headers))
+            content_length = resp.headers.get('content-length')
+            if not content_length:
+                print(f"{name} 未返回 Content-Length，改用临时文件")
+                return None
+            if resp.headers.get('content-encoding', 'identity').lower() != 'identity':
+                print(f"{name} 返回了压缩内容（{resp.headers['content-encoding']}），改用临时文件")
+                return None
+            
+            delete_existing_asset(target_release, name, assets_by_name)
+            print(f"流式上传 {name}（{content_length} 字节）")
+            # 响应流只能读取一次，不经 _gh_call 重试；失败时由调用方回退到临时文件
+            _rate_limiter.acquire()
+            uploaded_asset = upload_release_asset(
+                target_release, resp.raw, int(content_length), name, content_type
+            )
+        if uploaded_asset:
+            assets_by_name[name] = uploaded_asset
+        return uploaded_asset
+    except Exception as e:
+        print(f"流式上传 {name} 失败: {str(e)}，改用临时文件重试")
+        _direct_urls.pop(url, None)  # 直链可能已过期，重试时重新解析
+        return None
+
+
 ### 3. 源代码同步（仅判断存在性）
-def sync_source_code(tag_name, target_release, synced_data):
-    """同步源代码：仅检查目标是否存在文件，不存在则同步"""
+def sync_source_code(tag_name, target_release, store, assets_by_name):
+    """同步源代码：目标不存在（或无本地记录且大小与源不符）则同步（全部成功时返回 True）"""
     if not target_release:
         print(f"错误：target_release 为 None，无法同步源代码 {tag_name}")
         return False
@@ -124,164 +524,211 @@ def sync_source_code(tag_name, target_release, synced_data):
         f"SourceCode_{tag_name}.tar.gz": 
             f"https://github.com/{SOURCE_OWNER}/{SOURCE_REPO_NAME}/archive/refs/tags/{tag_name}.tar.gz"
     }
-    existing_assets = {a.name: a for a in target_release.get_assets()}  # 目标仓库现有文件
-    synced_data['source_codes'].setdefault(tag_name, {})
+    all_synced = True
+    now_str = datetime.datetime.now(datetime.timezone.utc).isoformat()
     
     for filename, url in source_files.items():
-        # 仅判断目标是否存在该文件
-        if filename in existing_assets:
+        target_asset = assets_by_name.get(filename)
+        if target_asset and store.has_source_code(tag_name, filename):
             print(f"目标仓库已存在 {filename}，跳过")
-            # 记录存在状态（避免下次重复检查）
-            if filename not in synced_data['source_codes'][tag_name]:
-                synced_data['source_codes'][tag_name][filename] = {
-                    'exists': True,
-                    'synced_at': str(datetime.datetime.now())
-                }
-                save_synced_data(synced_data)
             continue
         
-        # 目标不存在，需要同步
-        print(f"目标仓库缺失 {filename}，开始同步")
-        temp_path = f"temp_{filename}"
+        if target_asset:
+            # 本地记录丢失：HEAD 探测源文件大小，与目标一致（或源站未返回大小）则补记录，不重新下载
+            expected_size = get_remote_size(url)
+            if not expected_size or target_asset.size == expected_size:
+                print(f"目标仓库已存在 {filename}，补充记录后跳过")
+                store.mark_source_code(tag_name, filename, now_str)
+                continue
+            print(f"{filename} 大小不一致: 源={expected_size}B 目标={target_asset.size}B，重新同步")
+        else:
+            print(f"目标仓库缺失 {filename}，开始同步")
+        temp_path = None
         try:
-            download_file(url, temp_path)
-            uploaded_asset = retry_upload(
-                target_release, temp_path, filename, "application/zip"
+            uploaded_asset = stream_asset_to_release(
+                target_release, url, filename, "application/zip", assets_by_name
             )
+            if not uploaded_asset:
+                temp_path = make_temp_path(filename)
+                download_file(url, temp_path)
+                uploaded_asset = retry_upload(
+                    target_release, temp_path, filename, "application/zip", assets_by_name
+                )
             
             if uploaded_asset:
-                synced_data['source_codes'][tag_name][filename] = {
-                    'exists': True,
-                    'synced_at': str(datetime.datetime.now())
-                }
-                save_synced_data(synced_data)
+                store.mark_source_code(tag_name, filename, now_str)
                 print(f"同步成功 {filename}")
             else:
+                all_synced = False
                 print(f"同步 {filename} 失败")
         except Exception as e:
+            all_synced = False
             print(f"处理 {filename} 失败: {str(e)}")
         finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            if temp_path:
+                remove_temp_file(temp_path)
     
     print(f"===== 源代码同步完成: {tag_name} =====")
-    return True
+    return all_synced
 
 
 ### 4. Release附件同步（大小+时间判断）
-def sync_release_assets(source_release, target_release, synced_data):
-    """同步附件：大小不同 或 源时间更新 则同步"""
-    source_id = str(source_release.id)
-    source_assets = list(source_release.get_assets())
-    target_assets = {a.name: a for a in target_release.get_assets()}
-    synced_data['assets'].setdefault(source_id, {})
-    
-    print(f"\n===== 同步附件（{len(source_assets)} 个）: {source_release.tag_name} =====")
-    for asset in source_assets:
-        asset_name = asset.name
-        asset_key = f"{asset_name}_{asset.size}"  # 临时保留大小用于记录
-        content_type = asset.content_type or "application/octet-stream"
-        
-        # 源文件信息（转为UTC时间）
-        source_updated_at = asset.updated_at.astimezone(datetime.timezone.utc) if asset.updated_at else None
-        source_info = {
-            'size': asset.size,
-            'updated_at': source_updated_at.isoformat() if source_updated_at else None
-        }
-        print(f"源文件 {asset_name} 信息: 大小={source_info['size']}B，时间={source_info['updated_at']}")
-        
-        # 检查是否需要同步
-        need_sync = False
-        target_asset = target_assets.get(asset_name)
-        target_info = get_asset_info(target_asset)
-        
-        if asset_key not in synced_data['assets'][source_id]:
-            need_sync = True
-            print(f"本地记录缺失 {asset_name}，需要同步")
-        elif not target_asset:
+def sync_release_assets(source_id, tag_name, source_assets, target_release, store, assets_by_name):
+    """同步附件：大小不同 或 源时间更新 则同步（多个附件并发传输，全部成功时返回 True）"""
+    now_str = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    
+    print(f"\n===== 同步附件（{len(source_assets)} 个，并发 {CONCURRENCY}）: {tag_name} =====")
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        futures = [
+            executor.submit(sync_one_asset, asset, target_release, assets_by_name, store, source_id, now_str)
+            for asset in source_assets
+        ]
+        results = [future.result() for future in futures]
+    
+    print(f"===== 附件同步完成: {tag_name} =====")
+    return all(results)
+
+
+def sync_one_asset(asset, target_release, assets_by_name, store, source_id, now_str):
+    """同步单个附件（在线程池中执行），已是最新或同步成功时返回 True"""
+    asset_name = asset.name
+    asset_key = f"{asset_name}_{asset.size}"  # 临时保留大小用于记录
+    content_type = asset.content_type or "application/octet-stream"
+    
+    # 源文件信息
+    source_info = get_asset_info(asset)
+    print(f"源文件 {asset_name} 信息: 大小={source_info['size']}B，时间={asset.updated_at}")
+    
+    # 检查是否需要同步
+    need_sync = False
+    target_asset = assets_by_name.get(asset_name)
+    target_info = get_asset_info(target_asset)
+    record = store.get_asset(source_id, asset_key)
+    
+    if not record:
+        need_sync = True
+        print(f"本地记录缺失 {asset_name}，需要同步")
+    elif not target_asset:
+        need_sync = True
+        print(f"目标仓库缺失 {asset_name}，重新同步")
+    else:
+        # 大小不同则需要同步
+        if source_info['size'] != target_info['size']:
             need_sync = True
-            print(f"目标仓库缺失 {asset_name}，重新同步")
-        else:
-            # 大小不同则需要同步
-            if source_info['size'] != target_info['size']:
+            print(f"大小不一致: 源={source_info['size']}B 目标={target_info['size']}B")
+        # 大小相同但源时间更新则需要同步
+        elif source_info['updated_at'] and target_info['updated_at']:
+            if source_info['updated_at'] > target_info['updated_at']:
                 need_sync = True
-                print(f"大小不一致: 源={source_info['size']}B 目标={target_info['size']}B")
-            # 大小相同但源时间更新则需要同步
-            elif source_info['updated_at'] and target_info['updated_at']:
-                # 转为datetime对象比较（UTC时间）
-                source_time = datetime.datetime.fromisoformat(source_info['updated_at']).timestamp()
-                target_time = datetime.datetime.fromisoformat(target_info['updated_at']).timestamp()
-                if source_time > target_time:
-                    need_sync = True
-                    print(f"源文件更新: 源={source_info['updated_at']} 目标={target_info['updated_at']}")
+                print(f"源文件更新: 源={asset.updated_at} 目标={target_asset.updated_at}")
+    
+    # 目标文件完整但源时间变化：用缓存的 ETag 确认源内容是否真的变了
+    if (need_sync and record and target_asset and source_info['size'] == target_info['size']
+            and is_source_unchanged(asset.browser_download_url, record)):
+        print(f"源文件 {asset_name} 内容未变（304），跳过下载")
+        store.touch_asset(source_id, asset_key, now_str)
+        need_sync = False
+    
+    if not need_sync:
+        print(f"附件 {asset_name} 无需同步")
+        return True
+    
+    # 优先流式转传，失败时再下载到临时文件并重试上传
+    temp_path = None
+    validators = {}
+    try:
+        uploaded_asset = stream_asset_to_release(
+            target_release, asset.browser_download_url, asset_name, content_type, assets_by_name, validators
+        )
+        if not uploaded_asset:
+            temp_path = make_temp_path(asset_name)
+            download_file(asset.browser_download_url, temp_path, validators)
+            uploaded_asset = retry_upload(
+                target_release, temp_path, asset_name, content_type, assets_by_name
+            )
         
-        if not need_sync:
-            print(f"附件 {asset_name} 无需同步")
+        if uploaded_asset:
+            # 记录目标文件信息（用于下次比较）
+            actual_info = get_asset_info(uploaded_asset)
+            store.mark_asset(
+                source_id, asset_key, asset_name, actual_info['size'], actual_info['updated_at'],
+                validators.get('etag'), validators.get('last_modified'), now_str
+            )
+            print(f"同步成功 {asset_name}（大小={actual_info['size']}B，时间={uploaded_asset.updated_at}）")
+            return True
+        print(f"同步 {asset_name} 失败")
+    except Exception as e:
+        print(f"处理 {asset_name} 失败: {str(e)}")
+    finally:
+        if temp_path:
+            remove_temp_file(temp_path)
+    return False
+
+
+### 5. 辅助函数与主函数
+def report_progress(save_path, total_size, stop_event, interval=5):
+    """每隔 interval 秒打印一次下载进度，直到 stop_event 被设置"""
+    while not stop_event.wait(interval):
+        if not os.path.exists(save_path):
             continue
-        
-        # 下载并上传
-        temp_path = f"temp_{asset.id}_{asset_name}"
+        downloaded = os.path.getsize(save_path)
+        if total_size > 0:
+            percent = (downloaded / total_size) * 100
+            print(f"下载进度: {downloaded//(1024*1024):d}MB / {total_size//(1024*1024):d}MB ({percent:.1f}%)")
+        else:
+            print(f"下载进度: {downloaded//(1024*1024):d}MB")
+
+
+def download_file(url, save_path, validators=None):
+    """下载文件（失败时重试），validators 不为 None 时写入响应的 ETag/Last-Modified"""
+    for attempt in range(RETRY_COUNT):
         try:
-            download_file(asset.browser_download_url, temp_path)
-            uploaded_asset = retry_upload(
-                target_release, temp_path, asset_name, content_type
-            )
+            print(f"开始下载: {url}（尝试 {attempt+1}/{RETRY_COUNT}）")
+            # with 块确保出错时也关闭响应，连接归还会话连接池
+            with SESSION.get(resolve_download_url(url), stream=True, timeout=600) as resp:
+                resp.raise_for_status()
+                if validators is not None:
+                    validators.update(get_validators(resp.headers))
+                
+                with open(save_path, 'wb') as f:
+                    total_size = int(resp.headers.get('content-length', 0))
+                    # 1MiB 缓冲区整块拷贝（C 层循环），进度由后台线程按时间间隔打印
+                    resp.raw.decode_content = True
+                    stop_event = threading.Event()
+                    threading.Thread(
+                        target=report_progress, args=(save_path, total_size, stop_event), daemon=True
+                    ).start()
+                    try:
+                        shutil.copyfileobj(resp.raw, f, length=1024 * 1024)
+                    finally:
+                        stop_event.set()
             
-            if uploaded_asset:
-                # 记录目标文件信息（用于下次比较）
-                actual_info = get_asset_info(uploaded_asset)
-                synced_data['assets'][source_id][asset_key] = {
-                    'name': asset_name,
-                    'size': actual_info['size'],
-                    'updated_at': actual_info['updated_at'],
-                    'synced_at': str(datetime.datetime.now())
-                }
-                save_synced_data(synced_data)
-                print(f"同步成功 {asset_name}（大小={actual_info['size']}B，时间={actual_info['updated_at']}）")
-            else:
-                print(f"同步 {asset_name} 失败")
+            print(f"下载成功: {save_path}（{os.path.getsize(save_path)} 字节）")
+            return save_path
         except Exception as e:
-            print(f"处理 {asset_name} 失败: {str(e)}")
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-    
-    print(f"===== 附件同步完成: {source_release.tag_name} =====")
+            print(f"下载失败: {str(e)}")
+            _direct_urls.pop(url, None)  # 直链可能已过期，重试时重新解析
+            if os.path.exists(save_path):
+                os.remove(save_path)
+            if attempt == RETRY_COUNT - 1:
+                raise
+            response = getattr(e, 'response', None)
+            delay = retry_delay(attempt, response.headers if response is not None else None)
+            print(f"{delay:.1f} 秒后重试")
+            time.sleep(delay)
 
 
-### 5. 辅助函数与主函数
-def download_file(url, save_path):
-    """下载文件（支持断点续传）"""
-    if os.path.exists(save_path):
-        print(f"文件已存在: {save_path}，跳过下载")
-        return save_path
-    
+def find_release(target_repo, tag_name, draft):
+    """按Tag直接查询Release（单次请求）；草稿Release不会被按Tag接口返回，此时回退为遍历列表"""
     try:
-        print(f"开始下载: {url}")
-        resp = requests.get(url, stream=True, timeout=600)
-        resp.raise_for_status()
-        
-        with open(save_path, 'wb') as f:
-            total_size = int(resp.headers.get('content-length', 0))
-            downloaded = 0
-            chunk_size = 8192
-            
-            for chunk in resp.iter_content(chunk_size=chunk_size):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    # 打印进度（每 10MB 更新一次）
-                    if downloaded % (10 * 1024 * 1024) < chunk_size and total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"下载进度: {downloaded//(1024*1024):d}MB / {total_size//(1024*1024):d}MB ({percent:.1f}%)")
-        
-        print(f"下载成功: {save_path}（{os.path.getsize(save_path)} 字节）")
-        return save_path
-    except Exception as e:
-        print(f"下载失败: {str(e)}")
-        if os.path.exists(save_path):
-            os.remove(save_path)
-        raise
+        return _gh_call(target_repo.get_release, tag_name)
+    except UnknownObjectException:
+        if not draft:
+            return None
+    for release in _gh_call(lambda: list(target_repo.get_releases())):
+        if release.tag_name == tag_name:
+            return release
+    return None
 
 
 def get_or_create_release(target_repo, tag_name, name, body, draft, prerelease):
@@ -290,89 +737,174 @@ def get_or_create_release(target_repo, tag_name, name, body, draft, prerelease):
     print(f"查找 Release: {tag_name}")
     
     # 尝试获取现有Release
-    for release in target_repo.get_releases():
-        if release.tag_name == tag_name:
-            print(f"找到现有 Release: {tag_name}")
-            return release
+    release = find_release(target_repo, tag_name, draft)
+    if release:
+        print(f"找到现有 Release: {tag_name}")
+        return release
     
     # 创建新Release
     print(f"创建新 Release: {tag_name}")
     try:
         # 确保Tag存在
         try:
-            target_repo.get_git_ref(f"tags/{tag_name}")
+            _gh_call(target_repo.get_git_ref, f"tags/{tag_name}")
         except GithubException:
             default_branch = target_repo.default_branch
             print(f"创建 Tag: {tag_name} 基于 {default_branch}")
-            target_repo.create_git_ref(
+            _gh_call(
+                target_repo.create_git_ref,
                 ref=f"refs/tags/{tag_name}",
-                sha=target_repo.get_branch(default_branch).commit.sha
+                sha=_gh_call(target_repo.get_branch, default_branch).commit.sha
             )
         
         # 创建Release
-        release = target_repo.create_git_release(
-            tag=tag_name, name=release_name, message=body or "", draft=draft, prerelease=prerelease
+        release = _gh_call(
+            target_repo.create_git_release, tag=tag_name, name=release_name, message=body or "", draft=draft, prerelease=prerelease
         )
         return release
     except Exception as e:
         print(f"创建 Release 失败: {str(e)}")
         # 二次检查是否已存在
-        for release in target_repo.get_releases():
-            if release.tag_name == tag_name:
-                print(f"找到现有 Release（第二轮查找）: {tag_name}")
-                return release
-        return None
+        release = find_release(target_repo, tag_name, draft)
+        if release:
+            print(f"找到现有 Release（第二轮查找）: {tag_name}")
+        return release
+
+
+def _init_worker(db_path):
+    """进程池初始化：每个工作进程建立自己的 GitHub 客户端和状态库连接（限流器在 spawn 重新导入模块时已按进程数分摊）"""
+    global _worker
+    _worker = {
+        'target_github': make_github(GITHUB_TOKEN),
+        'store': Store(db_path),
+    }
+
+
+def process_release(release_info):
+    """在工作进程中同步单个Release（参数为可序列化的dict，状态直接写入状态库）"""
+    tag_name = release_info['tag_name']
+    source_id = str(release_info['id'])
+    store = _worker['store']
+    github_client = _worker['target_github']
+    try:
+        # 源附件与目标Release的元数据由主进程传入，还原为对象即可使用，无需再次请求
+        target_release = github_client.create_from_raw_data(GitRelease, release_info['target_release'])
+        source_assets = [github_client.create_from_raw_data(GitReleaseAsset, a) for a in release_info['assets']]
+        
+        # 目标资产列表每个Release只获取一次，后续删除/上传时本地维护
+        assets_by_name = {a.name: a for a in _gh_call(lambda: list(target_release.get_assets()))}
+        
+        # 同步源代码和附件
+        source_ok = sync_source_code(tag_name, target_release, store, assets_by_name)
+        assets_ok = sync_release_assets(
+            source_id, tag_name, source_assets, target_release, store, assets_by_name
+        )
+        
+        # 全部成功才标记为完全同步（下次运行据此跳过未变化的Release）
+        if source_ok and assets_ok:
+            store.mark_release(
+                source_id, tag_name, datetime.datetime.now(datetime.timezone.utc).isoformat(), release_info['updated_at']
+            )
+    finally:
+        cleanup_temp_files()
 
 
 def main():
-    synced_data = load_synced_data()
-    source_github = Github(SOURCE_GITHUB_TOKEN)
-    target_github = Github(GITHUB_TOKEN)
+    print(f"=== 配置信息 ===")
+    print(f"源仓库: {SOURCE_REPO}")
+    print(f"目标仓库: {TARGET_REPO}")
+    
+    # 状态库只在本次运行内使用：建在临时目录（不落在工作区），启动时从 JSON 导入，结束时导出并删除
+    db_dir = tempfile.mkdtemp(prefix='mirror_state_', dir=TEMP_DIR)
+    db_path = os.path.join(db_dir, 'synced_data.db')
+    store = Store(db_path)
+    store.import_json(load_synced_data())
+    # 被终止（如 Actions 超时取消）时转为正常退出，以便 finally 中导出状态文件
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    source_github = make_github(SOURCE_GITHUB_TOKEN)
+    target_github = make_github(GITHUB_TOKEN)
     
     try:
-        source_repo = source_github.get_repo(SOURCE_REPO)
-        target_repo = target_github.get_repo(TARGET_REPO)
-        source_releases = sorted(source_repo.get_releases(), key=lambda r: r.created_at)
-        print(f"发现 {len(source_releases)} 个 Release，开始处理...")
+        source_repo = _gh_call(source_github.get_repo, SOURCE_REPO)
+        target_repo = _gh_call(target_github.get_repo, TARGET_REPO)
+        # API 默认按创建时间倒序返回，本地反转即为正序，无需再排序
+        source_releases = _gh_call(lambda: list(source_repo.get_releases()))
+        source_releases.reverse()
+        print(f"发现 {len(source_releases)} 个 Release，开始处理（并行 {RELEASE_WORKERS} 个）...")
         
-        for release in source_releases:
-            tag_name = release.tag_name
-            source_id = str(release.id)
-            print(f"\n\n===== 开始处理 Release: {tag_name} =====")
-            
-            # 获取或创建目标Release
-            target_release = get_or_create_release(
-                target_repo, tag_name, release.name, release.body, release.draft, release.prerelease
-            )
-            
-            if not target_release:
-                print(f"无法获取或创建 {tag_name}，跳过")
-                continue
-            
-            # 同步源代码和附件
-            sync_source_code(tag_name, target_release, synced_data)
-            sync_release_assets(release, target_release, synced_data)
+        # 工作进程用 spawn 启动：fork 会把主进程已打开的 SQLite（WAL）连接状态带入子进程，可能损坏数据库
+        executor = ProcessPoolExecutor(
+            max_workers=RELEASE_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(db_path,)
+        )
+        try:
+            futures = {}
+            for release in source_releases:
+                tag_name = release.tag_name
+                source_id = str(release.id)
+                updated_at = get_release_updated_at(release)
+                
+                # 上次已完全同步且之后源Release无变化：不发任何API请求直接跳过
+                if store.is_release_synced(source_id, updated_at):
+                    print(f"Release {tag_name} 已完全同步且无变化，跳过")
+                    continue
+                
+                print(f"\n\n===== 开始处理 Release: {tag_name} =====")
+                wait_for_rate_limit(target_github)
+                
+                # 获取或创建目标Release（在主进程中按时间顺序进行，保持目标仓库Release的创建顺序）
+                target_release = get_or_create_release(
+                    target_repo, tag_name, release.name, release.body, release.draft, release.prerelease
+                )
+                
+                if not target_release:
+                    print(f"无法获取或创建 {tag_name}，跳过")
+                    continue
+                
+                # 列表接口已返回附件元数据，连同目标Release的地址一并传给工作进程
+                release_info = {
+                    'id': release.id,
+                    'tag_name': tag_name,
+                    'updated_at': updated_at,
+                    'target_release': {
+                        'id': target_release.id,
+                        'url': target_release.url,
+                        'upload_url': target_release.upload_url,
+                    },
+                    'assets': [{
+                        'name': a.name,
+                        'size': a.size,
+                        'updated_at': a.updated_at.strftime('%Y-%m-%dT%H:%M:%SZ') if a.updated_at else None,
+                        'content_type': a.content_type,
+                        'browser_download_url': a.browser_download_url,
+                    } for a in release.assets]
+                }
+                futures[executor.submit(process_release, release_info)] = tag_name
             
-            # 标记为完全同步
-            synced_data['releases'][source_id] = {
-                'tag_name': tag_name,
-                'fully_synced_at': str(datetime.datetime.now())
-            }
-            save_synced_data(synced_data)
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"处理 Release {futures[future]} 失败: {str(e)}")
+        finally:
+            # 被终止时取消尚未开始的 Release，且不等待进行中的任务，尽快进入导出状态文件的流程
+            executor.shutdown(wait=False, cancel_futures=True)
         
         print("\n===== 所有 Release 处理完成 =====")
-        print(f"已同步 Release: {len(synced_data['releases'])}")
-        print(f"已同步附件: {sum(len(v) for v in synced_data['assets'].values())}")
-        print(f"已同步源代码: {sum(len(v) for v in synced_data['source_codes'].values())} 个文件")
+        counts = store.counts()
+        print(f"已同步 Release: {counts['releases']}")
+        print(f"已同步附件: {counts['assets']}")
+        print(f"已同步源代码: {counts['source_codes']} 个文件")
     
     except Exception as e:
         print(f"全局错误: {str(e)}")
         traceback.print_exc()
     finally:
-        # 清理临时文件
-        for f in os.listdir('.'):
-            if f.startswith('temp_'):
-                os.remove(f)
+        # 导出 JSON 状态文件（供工作流提交）并清理临时文件
+        save_synced_data(store.export_json())
+        store.close()
+        shutil.rmtree(db_dir, ignore_errors=True)
+        cleanup_temp_files()
 
 
 if __name__ == "__main__":
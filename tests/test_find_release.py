@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+os.environ.setdefault('SOURCE_REPO', 'owner/source')
+os.environ.setdefault('GITHUB_REPOSITORY', 'owner/target')
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github import UnknownObjectException
+import mirror_github_releases as mirror
+
+
+class FakeRepo:
+    """模拟目标仓库：按Tag查询接口只返回已发布的Release（与 GitHub 一致，草稿Release返回404）"""
+
+    def __init__(self, *releases):
+        self.releases = list(releases)
+        self.calls = []
+
+    def get_release(self, tag_name):
+        self.calls.append('get_release')
+        for release in self.releases:
+            if release.tag_name == tag_name and not release.draft:
+                return release
+        raise UnknownObjectException(404, {'message': 'Not Found'}, {})
+
+    def get_releases(self):
+        self.calls.append('get_releases')
+        return iter(self.releases)
+
+    def create_git_release(self, **kwargs):
+        self.calls.append('create_git_release')
+        raise AssertionError('不应创建新的Release')
+
+
+def release(tag_name, draft=False):
+    return SimpleNamespace(tag_name=tag_name, draft=draft)
+
+
+class FindReleaseTest(unittest.TestCase):
+    def test_published_release_found_by_tag_without_listing(self):
+        target = release('v1')
+        repo = FakeRepo(release('v0'), target)
+        self.assertIs(mirror.find_release(repo, 'v1', draft=False), target)
+        self.assertEqual(repo.calls, ['get_release'])
+
+    def test_missing_published_release_does_not_scan_listing(self):
+        repo = FakeRepo(release('v0'))
+        self.assertIsNone(mirror.find_release(repo, 'v1', draft=False))
+        self.assertEqual(repo.calls, ['get_release'])
+
+    def test_draft_release_found_by_scanning_listing(self):
+        target = release('v1', draft=True)
+        repo = FakeRepo(release('v0'), target)
+        self.assertIs(mirror.find_release(repo, 'v1', draft=True), target)
+        self.assertEqual(repo.calls, ['get_release', 'get_releases'])
+
+    def test_missing_draft_release_returns_none(self):
+        repo = FakeRepo(release('v0', draft=True))
+        self.assertIsNone(mirror.find_release(repo, 'v1', draft=True))
+
+    def test_existing_draft_is_reused_instead_of_created(self):
+        target = release('v1', draft=True)
+        repo = FakeRepo(target)
+        self.assertIs(mirror.get_or_create_release(repo, 'v1', 'v1', '', True, False), target)
+        self.assertNotIn('create_git_release', repo.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
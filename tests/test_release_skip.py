@@ -0,0 +1,75 @@
+import os
+import sys
+import shutil
+import datetime
+import tempfile
+import unittest
+
+os.environ.setdefault('SOURCE_REPO', 'owner/source')
+os.environ.setdefault('GITHUB_REPOSITORY', 'owner/target')
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github import Github
+from github.GitRelease import GitRelease
+import mirror_github_releases as mirror
+
+CREATED = '2025-01-01T00:00:00Z'
+PUBLISHED = '2025-01-02T00:00:00Z'
+ASSET_UPDATED = '2025-01-03T00:00:00Z'
+
+
+def timestamp(value):
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def make_release(*asset_times, published_at=PUBLISHED):
+    # 与列表接口返回的数据结构一致，get_release_updated_at 不会发出请求
+    return Github().create_from_raw_data(GitRelease, {
+        'id': 1, 'tag_name': 'v1', 'created_at': CREATED, 'published_at': published_at,
+        'assets': [{'id': i, 'name': f"a{i}.apk", 'updated_at': t} for i, t in enumerate(asset_times)],
+    })
+
+
+class ReleaseUpdatedAtTest(unittest.TestCase):
+    def test_uses_latest_of_release_and_asset_times(self):
+        self.assertEqual(
+            mirror.get_release_updated_at(make_release(CREATED, ASSET_UPDATED)),
+            timestamp(ASSET_UPDATED)
+        )
+
+    def test_unpublished_release_without_assets_uses_created_at(self):
+        self.assertEqual(
+            mirror.get_release_updated_at(make_release(published_at=None)),
+            timestamp(CREATED)
+        )
+
+
+class ReleaseSkipTest(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.mkdtemp()
+        self.store = mirror.Store(os.path.join(self.db_dir, 'synced_data.db'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.db_dir, ignore_errors=True)
+
+    def test_unknown_release_is_not_synced(self):
+        self.assertFalse(self.store.is_release_synced('1', mirror.get_release_updated_at(make_release())))
+
+    def test_unchanged_release_is_skipped(self):
+        updated_at = mirror.get_release_updated_at(make_release(ASSET_UPDATED))
+        self.store.mark_release('1', 'v1', '2025-01-04T00:00:00+00:00', updated_at)
+        self.assertTrue(self.store.is_release_synced('1', updated_at))
+
+    def test_asset_updated_after_sync_is_not_skipped(self):
+        self.store.mark_release('1', 'v1', '2025-01-04T00:00:00+00:00', mirror.get_release_updated_at(make_release()))
+        self.assertFalse(self.store.is_release_synced('1', mirror.get_release_updated_at(make_release(ASSET_UPDATED))))
+
+    def test_legacy_record_without_updated_at_is_not_skipped(self):
+        self.store.import_json({'releases': {'1': {'tag_name': 'v1', 'fully_synced_at': '2025-10-25 18:16:09.216015'}}})
+        self.assertFalse(self.store.is_release_synced('1', mirror.get_release_updated_at(make_release())))
+
+
+if __name__ == '__main__':
+    unittest.main()
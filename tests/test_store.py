@@ -0,0 +1,72 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault('SOURCE_REPO', 'owner/source')
+os.environ.setdefault('GITHUB_REPOSITORY', 'owner/target')
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+import mirror_github_releases as mirror
+
+SYNCED_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'synced_data.json')
+
+
+class StoreTest(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.mkdtemp()
+        self.store = mirror.Store(os.path.join(self.db_dir, 'synced_data.db'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.db_dir, ignore_errors=True)
+
+    def assert_round_trip(self, raw):
+        self.store.import_json(orjson.loads(raw))
+        self.assertEqual(orjson.dumps(self.store.export_json(), option=orjson.OPT_INDENT_2), raw)
+
+    def test_committed_state_file_round_trips_byte_identical(self):
+        with open(SYNCED_DATA_PATH, 'rb') as f:
+            self.assert_round_trip(f.read())
+
+    def test_round_trip_keeps_order_empty_groups_and_optional_fields(self):
+        data = {
+            'releases': {
+                '20': {'tag_name': 'v2', 'fully_synced_at': '2025-01-02T00:00:00+00:00', 'updated_at': 1735776000.5},
+                '10': {'tag_name': 'v1', 'fully_synced_at': '2025-01-01 00:00:00'},
+            },
+            'assets': {
+                '20': {
+                    'b.apk_20': {
+                        'name': 'b.apk', 'size': 20, 'updated_at': 1735776000.0, 'etag': '"abc"',
+                        'last_modified': 'Thu, 02 Jan 2025 00:00:00 GMT', 'synced_at': '2025-01-02T00:00:00+00:00'
+                    },
+                    'a.apk_10': {'name': 'a.apk', 'size': 10, 'updated_at': '2025-01-01T00:00:00Z'},
+                },
+                '10': {},
+            },
+            'source_codes': {
+                'v2': {'SourceCode_v2.zip': {'exists': True, 'synced_at': '2025-01-02T00:00:00+00:00'}},
+                'v1': {'SourceCode_v1.tar.gz': {'exists': True}},
+            },
+        }
+        self.assert_round_trip(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+    def test_records_written_by_another_connection_are_exported(self):
+        self.store.import_json({'releases': {'1': {'tag_name': 'v1'}}})
+        other = mirror.Store(os.path.join(self.db_dir, 'synced_data.db'))
+        try:
+            other.mark_asset('1', 'a.apk_1', 'a.apk', 1, 1.0, None, None, 'now')
+            other.mark_source_code('v1', 'SourceCode_v1.zip', 'now')
+        finally:
+            other.close()
+        data = self.store.export_json()
+        self.assertEqual(data['assets']['1'], {'a.apk_1': {'name': 'a.apk', 'size': 1, 'updated_at': 1.0, 'synced_at': 'now'}})
+        self.assertEqual(data['source_codes']['v1'], {'SourceCode_v1.zip': {'exists': True, 'synced_at': 'now'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import sys
+import gzip
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('SOURCE_REPO', 'owner/source')
+os.environ.setdefault('GITHUB_REPOSITORY', 'owner/target')
+os.environ.setdefault('GITHUB_TOKEN', 'test-token')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github import Auth, Github
+from github.GitRelease import GitRelease
+import mirror_github_releases as mirror
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+GZIPPED = gzip.compress(PAYLOAD)
+
+
+class Handler(BaseHTTPRequestHandler):
+    uploads = []
+    downloads = []
+
+    def do_HEAD(self):
+        # 下载直链解析：无跳转
+        self.send_response(200)
+        self.end_headers()
+
+    def do_GET(self):
+        # 模拟源附件下载：返回带 Content-Length 的响应体
+        # /negotiate 在客户端接受 gzip 时压缩，/gzip 总是压缩（不理会 Accept-Encoding）
+        accept_encoding = self.headers.get('Accept-Encoding', '')
+        self.downloads.append(accept_encoding)
+        compress = self.path == '/gzip' or (self.path == '/negotiate' and 'gzip' in accept_encoding)
+        body = GZIPPED if compress else PAYLOAD
+        self.send_response(200)
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # 模拟 upload_url：记录请求头与请求体，返回新建的资产
+        headers = {k.lower(): v for k, v in self.headers.items()}
+        body = self.rfile.read(int(headers.get('content-length', 0)))
+        self.uploads.append((headers, body))
+        data = json.dumps({'id': 1, 'name': 'app.apk', 'size': len(body)}).encode()
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_release(base_url):
+    github_client = Github(auth=Auth.Token('release-token'))
+    return github_client.create_from_raw_data(GitRelease, {'id': 1, 'upload_url': f"{base_url}/upload{{?name,label}}"})
+
+
+class UploadReleaseAssetTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.uploads.clear()
+        Handler.downloads.clear()
+
+    def assert_sized_upload(self, asset):
+        headers, body = Handler.uploads[0]
+        self.assertEqual(headers.get('authorization'), 'token release-token')
+        self.assertEqual(headers.get('content-length'), str(len(PAYLOAD)))
+        self.assertNotIn('transfer-encoding', headers)
+        self.assertEqual(body, PAYLOAD)
+        self.assertEqual(asset.size, len(PAYLOAD))
+
+    def test_streamed_response_body_sends_only_content_length(self):
+        with mirror.SESSION.get(f"{self.base_url}/download", stream=True) as resp:
+            asset = mirror.upload_release_asset(
+                make_release(self.base_url), resp.raw, int(resp.headers['Content-Length']),
+                'app.apk', 'application/octet-stream'
+            )
+        self.assert_sized_upload(asset)
+
+    def test_file_body_sends_only_content_length(self):
+        path = mirror.make_temp_path('app.apk')
+        try:
+            with open(path, 'wb') as f:
+                f.write(PAYLOAD)
+            with open(path, 'rb') as f:
+                asset = mirror.upload_release_asset(
+                    make_release(self.base_url), f, len(PAYLOAD), 'app.apk', 'application/octet-stream'
+                )
+        finally:
+            mirror.remove_temp_file(path)
+        self.assert_sized_upload(asset)
+
+    def test_stream_requests_uncompressed_body(self):
+        asset = mirror.stream_asset_to_release(
+            make_release(self.base_url), f"{self.base_url}/negotiate", 'app.apk', 'application/octet-stream', {}
+        )
+        self.assertEqual(Handler.downloads, ['identity'])
+        self.assert_sized_upload(asset)
+
+    def test_compressed_response_falls_back_to_temp_file(self):
+        asset = mirror.stream_asset_to_release(
+            make_release(self.base_url), f"{self.base_url}/gzip", 'app.apk', 'application/octet-stream', {}
+        )
+        self.assertIsNone(asset)
+        self.assertEqual(Handler.uploads, [])
+
+
+if __name__ == '__main__':
+    unittest.main()